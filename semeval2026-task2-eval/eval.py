@@ -8,47 +8,201 @@ Provides:
 
 Notes
 - Inputs may be Python lists or numpy arrays.
-- Pearson r is computed using scipy.stats. If an input is constant (no variance) r will be returned as float("nan").
+- Pearson r is computed in closed form with NumPy; p-values come from the
+  Student-t CDF (scipy.special.stdtr). If an input is constant (no variance)
+  r will be returned as float("nan").
 - Functions return dicts; keys/payload vary by function and requested mode.
 """
 from typing import Sequence, Optional, Dict, Tuple, Any, List
 import numpy as np
-from scipy.stats import pearsonr
+from scipy.special import stdtr
+
+try:
+    import numba
+except ImportError:  # numba is optional; NumPy fallbacks below
+    numba = None
+
+# A group whose value spread is below this relative tolerance is treated as
+# constant: its centered moments are pure accumulation noise, and a correlation
+# computed from them would be meaningless (and summation-order dependent).
+_CONST_RTOL = 1e-12
+
+def _r_only(x: np.ndarray, y: np.ndarray) -> float:
+    """
+    Compute Pearson r without a p-value: centered dot products only, no
+    special-function evaluation. Returns nan on constant input.
+    """
+    # constancy checked on the raw values: centered sums of a constant array
+    # can round to nonzero noise (pearsonr applies the same exact check)
+    if x.min() == x.max() or y.min() == y.max():
+        return float("nan")
+    dx = x - x.mean()
+    dy = y - y.mean()
+    den = np.sqrt((dx @ dx) * (dy @ dy))
+    if den == 0.0:
+        return float("nan")
+    return float(np.clip((dx @ dy) / den, -1.0, 1.0))
+
 
 def _pearson(x: Sequence[float], y: Sequence[float]) -> Tuple[float, Optional[float]]:
     """
-    Compute Pearson r. If inputs have <2 non-NaN samples or are constant,
-    returns (nan, None).
+    Compute Pearson r and its two-sided p-value (closed-form t statistic fed
+    to the Student-t CDF). If inputs have <2 samples, returns (nan, None).
     """
     x_arr = np.asarray(x, dtype=float)
     y_arr = np.asarray(y, dtype=float)
 
-    if x_arr.size < 2:
+    n = x_arr.size
+    if n < 2:
         return float("nan"), None
-    # pearsonr raises ValueError on constant input; catch and return nan
-    r, p = pearsonr(x_arr, y_arr)
-    return float(r), float(p)
+    if n == 2:
+        # pearsonr convention: sign of the single slope, p = 1; NaN input
+        # yields (nan, nan) as with larger n
+        r2 = float(np.sign(x_arr[1] - x_arr[0]) * np.sign(y_arr[1] - y_arr[0]))
+        return r2, (1.0 if np.isfinite(r2) else float("nan"))
+    r = _r_only(x_arr, y_arr)
+    return r, _p_from_r(r, n)
+
+
+def _p_from_r(r: float, n: int) -> Optional[float]:
+    """Two-sided p-value for a Pearson r computed over n (>2) samples."""
+    if np.isnan(r):
+        return float("nan")
+    if r * r >= 1.0:
+        # |r| == 1: t diverges and the division below would raise; pearsonr
+        # returns exactly 0.0 here
+        return 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = r * np.sqrt((n - 2.0) / (1.0 - r * r))
+        p = 2.0 * stdtr(n - 2.0, -abs(t))
+    return float(p)
+
+
+if numba is not None:
+    # fastmath without the nnan/ninf flags: NaN cells must keep poisoning the
+    # correlation sums while the MAE skips them
+    @numba.njit(cache=True, fastmath={"nsz", "arcp", "contract", "afn", "reassoc"})
+    def _corr_and_mae(x: np.ndarray, y: np.ndarray) -> Tuple[float, float]:
+        """
+        Fused single pass over aligned float64 arrays: Welford-style running
+        means/second moments for Pearson r plus the NaN-skipping MAE sum.
+        """
+        mean_x = 0.0
+        mean_y = 0.0
+        m2x = 0.0
+        m2y = 0.0
+        cxy = 0.0
+        sabs = 0.0
+        n_abs = 0
+        for i in range(x.size):
+            xi = x[i]
+            yi = y[i]
+            k = i + 1
+            dx = xi - mean_x
+            mean_x += dx / k
+            dy = yi - mean_y
+            mean_y += dy / k
+            m2x += dx * (xi - mean_x)
+            m2y += dy * (yi - mean_y)
+            cxy += dx * (yi - mean_y)
+            d = xi - yi
+            if not np.isnan(d):
+                sabs += abs(d)
+                n_abs += 1
+        den = np.sqrt(m2x * m2y)
+        r = cxy / den if den > 0.0 else np.nan
+        if r > 1.0:
+            r = 1.0
+        elif r < -1.0:
+            r = -1.0
+        mae = sabs / n_abs if n_abs > 0 else np.nan
+        return r, mae
+    @numba.njit(parallel=True, cache=True, fastmath={"nsz", "arcp", "contract", "afn", "reassoc"})
+    def _peruser_moments(
+        ps: np.ndarray, ls: np.ndarray, starts: np.ndarray, ends: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Per-user centered second moments (Σdx², Σdy², Σdxdy) and NaN-skipping
+        MAE for arrays sorted by user, parallelized over users.
+        """
+        n_users = starts.size
+        n_dims = ps.shape[1]
+        sxx = np.empty((n_users, n_dims))
+        syy = np.empty((n_users, n_dims))
+        sxy = np.empty((n_users, n_dims))
+        mae = np.empty((n_users, n_dims))
+        for i in numba.prange(n_users):
+            s = starts[i]
+            e = ends[i]
+            cnt = e - s
+            for d in range(n_dims):
+                mx = 0.0
+                my = 0.0
+                for j in range(s, e):
+                    mx += ps[j, d]
+                    my += ls[j, d]
+                mx /= cnt
+                my /= cnt
+                axx = 0.0
+                ayy = 0.0
+                axy = 0.0
+                sab = 0.0
+                nab = 0
+                for j in range(s, e):
+                    dx = ps[j, d] - mx
+                    dy = ls[j, d] - my
+                    axx += dx * dx
+                    ayy += dy * dy
+                    axy += dx * dy
+                    dd = ps[j, d] - ls[j, d]
+                    if not np.isnan(dd):
+                        sab += abs(dd)
+                        nab += 1
+                sxx[i, d] = axx
+                syy[i, d] = ayy
+                sxy[i, d] = axy
+                mae[i, d] = sab / nab if nab > 0 else np.nan
+        return sxx, syy, sxy, mae
+else:
+    def _corr_and_mae(x: np.ndarray, y: np.ndarray) -> Tuple[float, float]:
+        """NumPy fallback when numba is unavailable: two separate passes."""
+        return _r_only(x, y), _mae(x, y)
+
+    _peruser_moments = None
 
 
 def _mae(x: Sequence[float], y: Sequence[float]) -> float:
     """
-    Compute Mean Absolute Error.
+    Compute Mean Absolute Error (NaN entries are skipped).
     """
     x_arr = np.asarray(x, dtype=float)
     y_arr = np.asarray(y, dtype=float)
-    
-    return float(np.nanmean(np.abs(x_arr - y_arr)))
+
+    d = x_arr - y_arr
+    np.abs(d, out=d)
+    # fast path: inputs already NaN-free (the common case after alignment)
+    if not np.isnan(d).any():
+        return float(d.sum() / d.size) if d.size else float("nan")
+    return float(np.nanmean(d))
 
 def task1_correlation(
     user_ids: Sequence[Any],
-    text_ids: Sequence[Any],
     predictions: Sequence[float],
     labels: Sequence[float],
-) -> Dict[str, Any]:
+) -> Any:
     """
     Compute three Pearson correlation metrics for Subtask 1 (always all are returned).
 
-    Metrics returned (flat dict):
+    user_ids may be any hashable values; integer codes (e.g. from pd.factorize)
+    group fastest. (The former text_ids argument was never used and has been
+    removed.)
+
+    predictions/labels may be 1-D (one dimension, e.g. valence) or 2-D with
+    shape (N, D) to score D dimensions in a single pass over the data; the
+    per-user groupby work is shared across all columns.
+
+    Metrics returned (flat dict for 1-D input, list of such dicts, one per
+    column, for 2-D input):
       - r_within: average of per-user Pearson r (nan if not computable)
       - p_within: harmonic-mean combined p-value of per-user tests (None if no p-values)
       - r_between: Pearson r computed across users after averaging predictions and labels per user
@@ -56,105 +210,174 @@ def task1_correlation(
       - r_composite: composite correlation via Fisher's z (nan if not computable)
       - mae_within: average of per-user MAE
       - mae_between: MAE computed across users after averaging predictions and labels per user
-      - mae_composite: composite MAE via Fisher's z
+      - mae_composite: average of within- and between-person MAE
     """
-    # convert to arrays
+    # convert to arrays; treat 1-D input as a single column
     user_arr = np.asarray(user_ids)
     preds = np.asarray(predictions, dtype=float)
     labs = np.asarray(labels, dtype=float)
+    single_dim = preds.ndim == 1
+    if single_dim:
+        preds = preds[:, None]
+        labs = labs[:, None]
+    n_dims = preds.shape[1]
 
     # --- within-person: per-user pearson, then average (ignores users with <2 samples) ---
-    unique_users = np.unique(user_arr)
-    per_user_r: Dict[str, float] = {}
-    per_user_p: Dict[str, Optional[float]] = {}
-    r_vals: List[float] = []
-    p_vals: List[float] = []
-
-    for u in unique_users:
-        mask = user_arr == u
-        if np.sum(mask) < 2:
-            continue
-        if np.var(labs[mask]) == 0.0:
-            continue
-        if np.var(preds[mask]) == 0.0:
-            per_user_r[str(u)] = 0.0
-            per_user_p[str(u)] = 1e-10
-            r_vals.append(0.0)
-            p_vals.append(1e-10)
-            continue
-        
-        r, p = _pearson(preds[mask], labs[mask])
-        per_user_r[str(u)] = r
-        per_user_p[str(u)] = p
-        r_vals.append(r)
-        p_vals.append(float(p))
-
-    r_within = float(np.mean(r_vals))
-    p_within = float(len(p_vals) / sum(1.0 / max(pv, 1e-10) for pv in p_vals))
+    # Sort once by user so every per-user quantity can be computed with a single
+    # np.add.reduceat pass over contiguous groups instead of one boolean mask per user.
+    order = np.argsort(user_arr, kind="stable")
+    users_sorted = user_arr[order]
+    ps = preds[order]
+    ls = labs[order]
+    unique_users, starts, counts = np.unique(
+        users_sorted, return_index=True, return_counts=True
+    )
+
+    # centered per-user sums (Σdx², Σdy², Σdxdy), numerically matching pearsonr,
+    # plus the per-user NaN-skipping MAE; all (U, D) so every dimension shares
+    # the single groupby pass. The numba kernel parallelizes over users; the
+    # reduceat fallback computes the same moments. The two paths may round
+    # differently, so degenerate groups are classified from the raw values
+    # below, never from the moments — scores must not depend on whether the
+    # optional accelerator is installed.
+    counts_col = counts[:, None]
+    ends = np.r_[starts[1:], users_sorted.size]
+    if _peruser_moments is not None:
+        sxx, syy, sxy, per_user_mae = _peruser_moments(ps, ls, starts, ends)
+    else:
+        mean_p = np.add.reduceat(ps, starts, axis=0) / counts_col
+        mean_l = np.add.reduceat(ls, starts, axis=0) / counts_col
+        dp = ps - np.repeat(mean_p, counts, axis=0)
+        dl = ls - np.repeat(mean_l, counts, axis=0)
+        sxx = np.add.reduceat(dp * dp, starts, axis=0)
+        syy = np.add.reduceat(dl * dl, starts, axis=0)
+        sxy = np.add.reduceat(dp * dl, starts, axis=0)
+
+        abs_err = np.abs(ps - ls)
+        err_valid = ~np.isnan(abs_err)
+        err_sums = np.add.reduceat(np.where(err_valid, abs_err, 0.0), starts, axis=0)
+        err_counts = np.add.reduceat(err_valid.astype(float), starts, axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            per_user_mae = err_sums / err_counts
+
+    # users with <2 samples or constant labels are ignored; constant predictions
+    # (with non-constant labels) score r=0 with a tiny p, as before. Constancy
+    # is detected on the raw values (per-group spread within _CONST_RTOL of the
+    # magnitude): the accumulated moments of a constant group round to tiny
+    # nonzero values, and dividing that noise would produce a meaningless
+    # finite r. Checking raw values also keeps the classification identical
+    # whichever moments path ran above.
+    def _group_const(a: np.ndarray) -> np.ndarray:
+        lo = np.minimum.reduceat(a, starts, axis=0)
+        hi = np.maximum.reduceat(a, starts, axis=0)
+        return (hi - lo) <= _CONST_RTOL * np.maximum(np.abs(lo), np.abs(hi))
+
+    keep = (counts_col >= 2) & ~_group_const(ls)
+    pred_const = keep & _group_const(ps)
+    regular = keep & ~pred_const
+
+    r_all = np.full(sxx.shape, np.nan)
+    p_all = np.full(sxx.shape, np.nan)
+    r_all[pred_const] = 0.0
+    p_all[pred_const] = 1e-10
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r_reg = np.clip(sxy[regular] / np.sqrt(sxx[regular] * syy[regular]), -1.0, 1.0)
+        # p-value via the closed-form t statistic in one vectorized call
+        n_reg = np.broadcast_to(counts_col, sxx.shape)[regular].astype(float)
+        t = r_reg * np.sqrt((n_reg - 2.0) / (1.0 - r_reg * r_reg))
+        p_reg = 2.0 * stdtr(n_reg - 2.0, -np.abs(t))
+    # pearsonr convention for two samples; NaN r (null cells) keeps a NaN p
+    p_reg[(n_reg == 2.0) & np.isfinite(r_reg)] = 1.0
+    r_all[regular] = r_reg
+    p_all[regular] = p_reg
+
+    # mean r and harmonic-mean p over kept users, per dimension, without a
+    # Python-level pass over the per-user values
+    kept = keep.sum(axis=0).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r_within = np.where(keep, r_all, 0.0).sum(axis=0) / kept
+        inv_p = np.where(keep, np.reciprocal(np.maximum(p_all, 1e-10)), 0.0)
+        p_within = kept / inv_p.sum(axis=0)
 
     # --- between-person: average per-user then pearson across users ---
-    user_means_pred: List[float] = []
-    user_means_lab: List[float] = []
-    for u in unique_users:
-        mask = user_arr == u
-        pred_mean = np.nanmean(preds[mask])
-        lab_mean = np.nanmean(labs[mask])
-        user_means_pred.append(pred_mean)
-        user_means_lab.append(lab_mean)
-
-    n_between = len(user_means_pred)
-    
-    r_between, p_between = _pearson(user_means_pred, user_means_lab)
-    
-    ### Compute the same for MAE
-    mae_within = []
-    for u in unique_users:
-        mask = user_arr == u
-        user_mae = _mae(preds[mask], labs[mask])
-        mae_within.append(user_mae)
-
-    mae_within = float(np.nanmean(mae_within))
-    mae_between = _mae(user_means_pred, user_means_lab)
-
-    # --- composite via Fisher's z (atanh average -> tanh) ---
-    def valid_for_arctanh(x: float) -> bool:
-        return not np.isnan(x) and abs(x) < 1.0
-
-    z_w = np.arctanh(r_within)
-    z_b = np.arctanh(r_between)
-    z_avg = 0.5 * (z_w + z_b)
-    r_composite = float(np.tanh(z_avg))
-    
-    mae_composite = 0.5 * (np.arctanh(mae_within) + np.arctanh(mae_between))
-    mae_composite = float(np.tanh(mae_composite))
-
-    # assemble flat dict and return
-    return {
-        "r_within": r_within,
-        "p_within": p_within,
-        "r_between": r_between,
-        "p_between": p_between,
-        "r_composite": r_composite,
-        "mae_within": mae_within,
-        "mae_between": mae_between,
-        "mae_composite": mae_composite
-    }
+    # nan-aware grouped means in one C-level pass (valid-sum / valid-count)
+    # instead of one nanmean call per user
+    valid_p = ~np.isnan(ps)
+    valid_l = ~np.isnan(ls)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means_pred = (
+            np.add.reduceat(np.where(valid_p, ps, 0.0), starts, axis=0)
+            / np.add.reduceat(valid_p.astype(float), starts, axis=0)
+        )
+        means_lab = (
+            np.add.reduceat(np.where(valid_l, ls, 0.0), starts, axis=0)
+            / np.add.reduceat(valid_l.astype(float), starts, axis=0)
+        )
+
+    ### Within-person MAE: average the per-user values from the grouped pass
+    mae_within = np.nanmean(per_user_mae, axis=0)
+
+    # --- per-dimension scalars: between-person r/p/MAE and composites ---
+    results: List[Dict[str, Any]] = []
+    for d in range(n_dims):
+        r_between, p_between = _pearson(means_pred[:, d], means_lab[:, d])
+        mae_between = _mae(means_pred[:, d], means_lab[:, d])
+
+        # composite via Fisher's z (atanh average -> tanh); clip so |r|=1
+        # cannot blow up to inf
+        z_w = np.arctanh(np.clip(r_within[d], -0.999999, 0.999999))
+        z_b = np.arctanh(np.clip(r_between, -0.999999, 0.999999))
+        r_composite = float(np.tanh(0.5 * (z_w + z_b)))
+
+        # MAE is unbounded, so a Fisher-z composite is ill-defined (arctanh
+        # needs |x|<1); use the plain average of within and between MAE
+        mae_composite = 0.5 * (float(mae_within[d]) + mae_between)
+
+        results.append({
+            "r_within": float(r_within[d]),
+            "p_within": float(p_within[d]),
+            "r_between": r_between,
+            "p_between": p_between,
+            "r_composite": r_composite,
+            "mae_within": float(mae_within[d]),
+            "mae_between": mae_between,
+            "mae_composite": mae_composite
+        })
+
+    return results[0] if single_dim else results
 
 
 def task2_correlation(
     user_ids: Optional[Sequence[Any]],
     predictions: Sequence[float],
     labels: Sequence[float],
-) -> Dict[str, Any]:
+) -> Any:
     """
     Compute Pearson correlation for Subtask 2a/2b.
 
+    predictions/labels may be 1-D or 2-D (N, D) to score several dimensions
+    from one aligned load.
+
     TODO: user_ids might be used for additional sub-metrics.
-    
-    Returns a dict: {"r": float, "p": float, "mae": float (optional)}
+
+    Returns a dict {"r": float, "p": float, "mae": float} for 1-D input,
+    or a list of such dicts (one per column) for 2-D input.
     """
+    preds = np.asarray(predictions, dtype=float)
+    labs = np.asarray(labels, dtype=float)
 
-    r, p = _pearson(predictions, labels)
-    mae = _mae(predictions, labels)
+    def _score(x: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+        n = x.size
+        if n <= 2:
+            # short inputs keep the _pearson conventions (nan/None, sign rule)
+            r, p = _pearson(x, y)
+            return {"r": r, "p": p, "mae": _mae(x, y)}
+        r, mae = _corr_and_mae(
+            np.ascontiguousarray(x, dtype=np.float64),
+            np.ascontiguousarray(y, dtype=np.float64),
+        )
+        return {"r": float(r), "p": _p_from_r(r, n), "mae": float(mae)}
 
-    return {"r": r, "p": p, "mae": mae}
+    if preds.ndim == 1:
+        return _score(preds, labs)
+    return [_score(preds[:, d], labs[:, d]) for d in range(preds.shape[1])]
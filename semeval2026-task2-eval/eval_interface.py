@@ -16,11 +16,13 @@ When called with return_dict=True the function returns a structured dict with st
 """
 from typing import Dict, Any, List, Tuple, Optional
 import argparse
-import csv
 import json
 import os
 import sys
 
+import numpy as np
+import pandas as pd
+
 import format_checker
 import eval as eval_mod
 from constants import (
@@ -30,39 +32,98 @@ from constants import (
     LABEL_COLS_DEFAULT
 )
 
-def _read_csv_map(path: str, key_cols: List[str]) -> Tuple[Dict[Tuple[str, ...], Dict[str, str]], List[str]]:
+def _read_csv_map(
+    path: str, key_cols: List[str], usecols: Optional[List[str]] = None
+) -> Tuple[pd.DataFrame, List[str]]:
     """
-    Read CSV and return a map from key tuple -> row dict, and list of duplicate key strings.
-    Key columns are taken in order and converted to str.
+    Read CSV and return a DataFrame indexed by the key columns (first occurrence
+    wins), and a list of duplicate key strings. Key columns are taken in order
+    and stripped of surrounding whitespace; all cells are kept as str.
+    usecols optionally projects the parse down to the listed columns.
     """
     if not os.path.isfile(path):
         raise FileNotFoundError(path)
-    with open(path, newline="", encoding="utf-8") as fh:
-        reader = csv.DictReader(fh)
-        rows = list(reader)
-    m: Dict[Tuple[str, ...], Dict[str, str]] = {}
-    duplicates: List[str] = []
-    for r in rows:
-        key = tuple((r.get(c, "").strip() for c in key_cols))
-        if key in m:
-            duplicates.append(",".join(key)
-            )
-        else:
-            m[key] = r
-    return m, duplicates
-
-
-def _safe_float(s: Optional[str]) -> float:
-    """Convert string to float, return np.nan on empty / invalid."""
-    if s is None:
-        return float("nan")
-    s = s.strip()
-    if s == "" or s.lower() in {"none", "null"}:
-        return float("nan")
-    try:
-        return float(s)
-    except Exception:
-        return float("nan")
+    df = format_checker.read_csv_df(path, usecols=usecols)
+    # the cached frame is shared with the format checker; do not mutate it
+    keys = pd.DataFrame(
+        {
+            c: (df[c] if c in df.columns else pd.Series("", index=df.index)).str.strip()
+            for c in key_cols
+        }
+    )
+    dup_mask = keys.duplicated(keep="first").to_numpy()
+    duplicates: List[str] = (
+        keys.loc[dup_mask].agg(",".join, axis=1).tolist() if dup_mask.any() else []
+    )
+    out = df.loc[~dup_mask]
+    out.index = pd.MultiIndex.from_frame(keys.loc[~dup_mask])
+    return out, duplicates
+
+
+def _to_float_array(series: pd.Series) -> np.ndarray:
+    """
+    Convert a column of string cells to float64 in one vectorized pass.
+    Empty cells, null sentinels ("none"/"null") and unparsable values become NaN.
+    """
+    return pd.to_numeric(series.str.strip(), errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _print_metrics(task: str, dimension: str, metrics: Dict[str, Any]) -> None:
+    """Pretty-print the metrics dict for one task/dimension."""
+    print(f"Evaluation results for {task} ({dimension}):")
+
+    # Helper for p-value formatting (used by both blocks)
+    def fmt_p(val):
+        if val is None: return "N/A"
+        if val < 0.0001: return f"{val:.2e}"
+        return f"{val:.4f}"
+
+    if task == "subtask1":
+        # Subtask 1: Group specific between/within/composite keys
+        groups = [("r_between", "p_between"), ("r_within", "p_within"), ("r_composite", None)]
+        processed = set()
+
+        for r_key, p_key in groups:
+            if r_key in metrics:
+                r_val = metrics[r_key]
+                p_str = ""
+                if p_key and p_key in metrics:
+                    p_val = metrics[p_key]
+                    p_str = f" ({fmt_p(p_val)})"
+                    processed.add(p_key)
+                print(f"  {r_key:<14} {r_val:.3f}{p_str}")
+                processed.add(r_key)
+
+        # Print remaining keys for subtask1 (like MAE)
+        for k in sorted(metrics.keys()):
+            if k not in processed:
+                v = metrics[k]
+                print(f"  {k:<14} {v:.3f}")
+
+    else:
+        # Subtask 2 / Generic: Group 'r' and 'p' if they exist
+        processed = set()
+
+        # Check specifically for standard 'r'
+        if "r" in metrics:
+            r_val = metrics["r"]
+            p_str = ""
+            if "p" in metrics:
+                p_val = metrics["p"]
+                p_str = f" ({fmt_p(p_val)})"
+                processed.add("p")
+
+            print(f"  {'r':<14} {r_val:.3f}{p_str}")
+            processed.add("r")
+
+        # Print remaining keys (like 'mae', 'n', etc.)
+        for k in sorted(metrics.keys()):
+            if k not in processed:
+                v = metrics[k]
+                if isinstance(v, (int, float)):
+                    print(f"  {k:<14} {v:.3f}")
+                else:
+                    print(f"  {k:<14} {v}")
 
 
 def evaluate_submission(
@@ -70,24 +131,39 @@ def evaluate_submission(
     submission_path: str,
     labels_path: str,
     assets_dir: str = "assets",
-    dimension: str = "valence",
+    dimension: Optional[str] = None,
     return_dict: bool = False,
     json_out: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
-    Run format check, then compute evaluation metric for one dimension (valence or arousal).
+    Run format check, then compute evaluation metrics.
+
+    All dimensions (valence and arousal) are scored in a single pass over the
+    data; parsing, alignment and the per-user groupby are shared. When
+    `dimension` is given it only filters what is printed/returned.
 
     Returns a dict with keys:
       - status: 'ok' or 'format_fail' or 'duplicate_error' or 'label_missing' etc.
-      - task, dimension
+      - task, and either 'dimension' (single) or 'dimensions' (all)
       - warnings: list[str]
-      - metrics: output from eval.py functions under 'metrics'
+      - metrics: output from eval.py functions under 'metrics'; keyed by
+        dimension name when all dimensions are evaluated
     """
     warnings: List[str] = []
 
-    # 1) run format checker
+    # 1) run format checker, handing over a single parse of the submission
     if task != "subtask1":
-        rc = format_checker.run_format_check(task, submission_path, assets_dir=assets_dir)
+        # leave sub_parsed as None on an empty/unreadable file so the format
+        # checker reports it the same way it does when parsing itself
+        sub_parsed = None
+        if os.path.isfile(submission_path):
+            try:
+                sub_parsed = format_checker.read_csv_df(submission_path)
+            except pd.errors.EmptyDataError:
+                pass
+        rc = format_checker.run_format_check(
+            task, submission_path, assets_dir=assets_dir, submission_df=sub_parsed
+        )
         if rc != 0:
             msg = f"Format check failed (exit code {rc})."
             if return_dict:
@@ -101,8 +177,13 @@ def evaluate_submission(
     key_cols = KEY_COLUMNS_DEFAULT[task]
     template_keys = format_checker.load_template_keys(template_path, task)
 
+    # columns evaluated; every dimension unless one was explicitly requested
+    pred_cols = PRED_COLS_DEFAULT[task]
+    label_cols = LABEL_COLS_DEFAULT[task]
+    dims = list(pred_cols) if dimension is None else [dimension]
+
     # 3) load submission and labels
-    sub_map, sub_duplicates = _read_csv_map(submission_path, key_cols)
+    sub_df, sub_duplicates = _read_csv_map(submission_path, key_cols)
     if sub_duplicates:
         msg = f"ERROR: duplicate keys in submission: {len(sub_duplicates)} examples: {sub_duplicates[:5]}"
         if return_dict:
@@ -110,7 +191,11 @@ def evaluate_submission(
         print(msg, file=sys.stderr)
         sys.exit(2)
 
-    labels_map, label_duplicates = _read_csv_map(labels_path, key_cols)
+    # the labels file carries many unused columns (text, timestamps); project
+    # the parse down to the keys plus the label columns we score
+    lab_df, label_duplicates = _read_csv_map(
+        labels_path, key_cols, usecols=key_cols + [label_cols[d] for d in dims]
+    )
     if label_duplicates:
         # duplicates in labels file — treat as error
         msg = f"ERROR: duplicate keys in labels file: {len(label_duplicates)} examples: {label_duplicates[:5]}"
@@ -120,46 +205,34 @@ def evaluate_submission(
         sys.exit(2)
 
     # 4) build arrays in template key order
-    # use defaults from constants module
-    pred_col = PRED_COLS_DEFAULT[task][dimension]
-    label_col = LABEL_COLS_DEFAULT[task][dimension]
-
-    preds: List[float] = []
-    labs: List[float] = []
-    users: List[str] = []
-    texts: List[str] = []
+    # align submission and labels against the template with vectorized index ops
+    # instead of per-key dict lookups; template_keys is already a MultiIndex
+    tmpl_idx = template_keys.sort_values()
+    have_sub = tmpl_idx.isin(sub_df.index)
+    have_lab = tmpl_idx.isin(lab_df.index)
 
     missing_label_keys: List[Tuple[str, ...]] = []
     missing_submission_keys: List[Tuple[str, ...]] = []
+    if task != "subtask1":
+        missing_submission_keys = list(tmpl_idx[~have_sub])
+        missing_label_keys = list(tmpl_idx[have_sub & ~have_lab])
+
+    keep_idx = tmpl_idx[have_sub & have_lab]
+    sub_al = sub_df.reindex(keep_idx)
+    lab_al = lab_df.reindex(keep_idx)
+
+    def _aligned_column(df: pd.DataFrame, col: str) -> np.ndarray:
+        if col in df.columns:
+            return _to_float_array(df[col])
+        return np.full(len(keep_idx), np.nan)
+
+    # (N, D) matrices: one column per evaluated dimension
+    preds = np.column_stack([_aligned_column(sub_al, pred_cols[d]) for d in dims])
+    labs = np.column_stack([_aligned_column(lab_al, label_cols[d]) for d in dims])
 
-    for key in sorted(template_keys):
-        # key is tuple of strings
-        sub_row = sub_map.get(key)
-        lab_row = labels_map.get(key)
-        if sub_row is None:
-            if task == "subtask1":
-                continue
-            missing_submission_keys.append(key)
-            continue
-        if lab_row is None:
-            if task == "subtask1":
-                continue
-            missing_label_keys.append(key)
-            continue
-        # read values
-        pred_val = _safe_float(sub_row.get(pred_col))
-        lab_val = _safe_float(lab_row.get(label_col))
-            
-        preds.append(pred_val)
-        labs.append(lab_val)
-        # store user/text for eval functions
-        # fill based on key columns
-        if task == "subtask1":
-            users.append(key[0])
-            texts.append(key[1])
-        else:
-            users.append(key[0])
-            texts.append("")
+    # factorize user ids to int codes once; the groupby machinery in eval.py
+    # sorts and hashes these much faster than object arrays of strings
+    users, _ = pd.factorize(keep_idx.get_level_values(0))
 
     if missing_submission_keys:
         msg = f"ERROR: submission missing {len(missing_submission_keys)} rows from template. Example: {missing_submission_keys[:5]}"
@@ -175,78 +248,27 @@ def evaluate_submission(
         print(msg, file=sys.stderr)
         sys.exit(2)
 
-    # 5) compute metrics
-    metrics: Dict[str, Any] = {}
+    # 5) compute metrics for every dimension in one call
     if task == "subtask1":
-        metrics = eval_mod.task1_correlation(users, texts, preds, labs)
+        per_dim = eval_mod.task1_correlation(users, preds, labs)
     else:
         # for task2 use between-person metric via task2_correlation (user_ids provided)
-        metrics = eval_mod.task2_correlation(users, preds, labs)
+        per_dim = eval_mod.task2_correlation(users, preds, labs)
+    metrics_by_dim: Dict[str, Dict[str, Any]] = dict(zip(dims, per_dim))
 
-    out: Dict[str, Any] = {"status": "ok", "task": task, "dimension": dimension, "metrics": metrics, "warnings": warnings}
+    if dimension is None:
+        out: Dict[str, Any] = {"status": "ok", "task": task, "dimensions": dims, "metrics": metrics_by_dim, "warnings": warnings}
+    else:
+        out = {"status": "ok", "task": task, "dimension": dimension, "metrics": metrics_by_dim[dimension], "warnings": warnings}
 
     # 6) output
     if json_out:
         with open(json_out, "w", encoding="utf-8") as fo:
             json.dump(out, fo, indent=2)
 
-
-
     # pretty print
-    print(f"Evaluation results for {task} ({dimension}):")
-
-    # Helper for p-value formatting (used by both blocks)
-    def fmt_p(val):
-        if val is None: return "N/A"
-        if val < 0.0001: return f"{val:.2e}"
-        return f"{val:.4f}"
-
-    if task == "subtask1":
-        # Subtask 1: Group specific between/within/composite keys
-        groups = [("r_between", "p_between"), ("r_within", "p_within"), ("r_composite", None)]
-        processed = set()
-
-        for r_key, p_key in groups:
-            if r_key in metrics:
-                r_val = metrics[r_key]
-                p_str = ""
-                if p_key and p_key in metrics:
-                    p_val = metrics[p_key]
-                    p_str = f" ({fmt_p(p_val)})"
-                    processed.add(p_key)
-                print(f"  {r_key:<14} {r_val:.3f}{p_str}")
-                processed.add(r_key)
-        
-        # Print remaining keys for subtask1 (like MAE)
-        for k in sorted(metrics.keys()):
-            if k not in processed:
-                v = metrics[k]
-                print(f"  {k:<14} {v:.3f}")
-
-    else:
-        # Subtask 2 / Generic: Group 'r' and 'p' if they exist
-        processed = set()
-        
-        # Check specifically for standard 'r'
-        if "r" in metrics:
-            r_val = metrics["r"]
-            p_str = ""
-            if "p" in metrics:
-                p_val = metrics["p"]
-                p_str = f" ({fmt_p(p_val)})"
-                processed.add("p")
-            
-            print(f"  {'r':<14} {r_val:.3f}{p_str}")
-            processed.add("r")
-
-        # Print remaining keys (like 'mae', 'n', etc.)
-        for k in sorted(metrics.keys()):
-            if k not in processed:
-                v = metrics[k]
-                if isinstance(v, (int, float)):
-                    print(f"  {k:<14} {v:.3f}")
-                else:
-                    print(f"  {k:<14} {v}")
+    for d in dims:
+        _print_metrics(task, d, metrics_by_dim[d])
 
     if warnings:
         print("Warnings:")
@@ -261,7 +283,7 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--submission", required=True, help="path to submission CSV")
     p.add_argument("--labels", required=True, help="path to gold labels CSV")
     p.add_argument("--assets-dir", default="assets", help="assets directory containing templates for submission files (user_ids and text_ids will be updated in the template during the evaluation phase.")
-    p.add_argument("--dimension", choices=["valence", "arousal", "pred_state_change_valence", "pred_state_change_arousal"], default="valence")
+    p.add_argument("--dimension", choices=["valence", "arousal"], default=None, help="restrict output to one dimension; both are evaluated in a single pass either way")
     p.add_argument("--json", help="optional path to write JSON output")
     return p.parse_args()
 
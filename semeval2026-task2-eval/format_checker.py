@@ -17,13 +17,25 @@ API usage (importable):
     # rc == 0 -> passed (warnings allowed)
     # rc == 2 -> failed
 
-This script uses only Python stdlib modules: csv, argparse, os, sys, typing.
+This script uses the Python stdlib plus pandas for CSV parsing.
 """
 import argparse
-import csv
+import functools
+import heapq
+import mmap
 import os
 import sys
 from typing import Dict, List, Tuple, Set, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # pyarrow is optional; pandas covers everything below
+    pa = None
+    pacsv = None
+
 from constants import (
     TEMPLATES_DEFAULT,
     REQUIRED_COLUMNS_DEFAULT,
@@ -33,12 +45,65 @@ from constants import (
 )
 
 
-def read_csv_dicts(path: str) -> List[Dict[str, str]]:
-    """Read a CSV file and return list of rows as dicts (csv.DictReader)."""
-    with open(path, newline="", encoding="utf-8") as fh:
-        reader = csv.DictReader(fh)
-        rows = [row for row in reader]
-    return rows
+# Parsed-CSV cache keyed by (absolute path, mtime, usecols tuple) so the
+# format check and the evaluation (including a second dimension over the same
+# file) share one parse.
+_parse_cache: Dict[Tuple[str, float, Optional[Tuple[str, ...]]], pd.DataFrame] = {}
+
+# Files above this size are memory-mapped instead of read through a buffered
+# file object, so the parser streams straight from the page cache without an
+# extra userspace copy of the whole file.
+_MMAP_THRESHOLD = 64 * 1024 * 1024
+
+
+def _csv_columns(path: str) -> List[str]:
+    """Column names of a CSV file (header-only parse)."""
+    return [str(c) for c in pd.read_csv(path, nrows=0).columns]
+
+
+def read_csv_df(path: str, usecols: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read a CSV file as an all-string DataFrame (empty cells kept as ""),
+    reusing a cached parse when the file has not changed on disk.
+
+    usecols restricts parsing to the listed columns (those present in the
+    file); the multithreaded pyarrow reader is used when available, with
+    pandas as fallback.
+
+    Callers must treat the returned frame as read-only.
+    """
+    cols_key = tuple(usecols) if usecols is not None else None
+    cache_key = (os.path.abspath(path), os.path.getmtime(path), cols_key)
+    df = _parse_cache.get(cache_key)
+    if df is not None:
+        return df
+
+    header = _csv_columns(path)
+    wanted = [c for c in usecols if c in header] if usecols is not None else None
+
+    def _parse(source) -> pd.DataFrame:
+        if pacsv is not None:
+            convert = pacsv.ConvertOptions(
+                column_types={c: pa.string() for c in header},
+                include_columns=wanted,
+            )
+            parse = pacsv.ParseOptions(newlines_in_values=True)
+            return pacsv.read_csv(
+                source, convert_options=convert, parse_options=parse
+            ).to_pandas()
+        return pd.read_csv(source, dtype=str, keep_default_na=False, usecols=wanted)
+
+    if os.path.getsize(path) > _MMAP_THRESHOLD:
+        # the mmap object is itself file-like, so both parsers stream from it
+        # directly; the frame is fully materialized before the map is closed
+        with open(path, "rb") as fh, mmap.mmap(
+            fh.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm:
+            df = _parse(mm)
+    else:
+        df = _parse(path)
+    _parse_cache[cache_key] = df
+    return df
 
 
 def norm(s: Optional[str]) -> str:
@@ -68,54 +133,81 @@ def check_columns(sub_cols: List[str], required: List[str]) -> Tuple[bool, List[
     return ok, missing, extra
 
 
-def build_key(row: Dict[str, str], task: str) -> Tuple[str, ...]:
+def load_template_keys(template_path: str, task: str) -> pd.MultiIndex:
     """
-    Build grouping key for a row based on task:
-      - subtask1 -> (user_id, text_id)
-      - subtask2a/2b -> (user_id,)
+    Load keys from template CSV (canonical set of expected rows) as a
+    MultiIndex, whose set operations (difference/intersection/isin) run at
+    C level over hashed codes instead of on Python tuples.
+
+    Templates are static assets, so the derived keys are cached by
+    (path, mtime, task) across calls — e.g. when scoring many submissions
+    against the same template.
     """
-    if task == "subtask1":
-        return (norm(row.get("user_id", "")), norm(row.get("text_id", "")))
-    return (norm(row.get("user_id", "")),)
+    return _load_template_keys_cached(
+        template_path, os.path.getmtime(template_path), task
+    )
 
 
-def load_template_keys(template_path: str, task: str) -> Set[Tuple[str, ...]]:
-    """Load keys from template CSV (canonical set of expected rows)."""
-    rows = read_csv_dicts(template_path)
-    keys = set()
-    for r in rows:
-        keys.add(build_key(r, task))
-    return keys
+@functools.lru_cache(maxsize=8)
+def _load_template_keys_cached(
+    template_path: str, mtime: float, task: str
+) -> pd.MultiIndex:
+    key_cols = KEY_COLUMNS_DEFAULT[task]
+    df = read_csv_df(template_path, usecols=key_cols)
+    # vectorized strip instead of one norm() call per cell
+    return pd.MultiIndex.from_frame(
+        pd.DataFrame({c: df[c].str.strip() for c in key_cols})
+    )
 
 
 def load_submission_keys_and_nulls(
-    submission_path: str,
+    submission_df: pd.DataFrame,
     task: str,
     required: List[str],
     null_values: Set[str],
-) -> Tuple[Set[Tuple[str, ...]], List[str], List[Tuple[Tuple[str, ...], str]]]:
+) -> Tuple[pd.MultiIndex, List[str], List[Tuple[Tuple[str, ...], str]]]:
     """
-    Read submission rows and return:
-      - set of keys present
+    Scan parsed submission rows and return:
+      - MultiIndex of keys present (row order, duplicates included)
       - list of duplicate key string representations
       - list of (key, pred_field) tuples where prediction cells are null/missing
     """
-    rows = read_csv_dicts(submission_path)
-    keys: Set[Tuple[str, ...]] = set()
-    duplicate_keys: List[str] = []
+    key_cols = KEY_COLUMNS_DEFAULT.get(task, [])
+    keys = pd.MultiIndex.from_frame(
+        pd.DataFrame(
+            {
+                c: (
+                    submission_df[c]
+                    if c in submission_df.columns
+                    else pd.Series("", index=submission_df.index)
+                ).str.strip()
+                for c in key_cols
+            }
+        )
+    )
+    dup_mask = keys.duplicated(keep="first")
+    duplicate_keys: List[str] = [",".join(k) for k in keys[dup_mask]]
+
+    # null prediction cells: one vectorized isin per prediction column instead
+    # of an is_null() call per cell; a column absent from the submission counts
+    # as null for every row
+    pred_fields = [f for f in required if f.startswith("pred")]
     null_entries: List[Tuple[Tuple[str, ...], str]] = []
-    seen: Set[Tuple[str, ...]] = set()
-    for r in rows:
-        key = build_key(r, task)
-        if key in seen:
-            duplicate_keys.append(",".join(key))
-        seen.add(key)
-        keys.add(key)
-        # check prediction fields for null
-        pred_fields = [f for f in required if f.startswith("pred")]
-        for pf in pred_fields:
-            if pf not in r or is_null(r.get(pf, ""), null_values):
-                null_entries.append((key, pf))
+    if pred_fields and len(submission_df):
+        null_mask = pd.concat(
+            [
+                (
+                    submission_df[pf].str.strip().isin(null_values)
+                    if pf in submission_df.columns
+                    else pd.Series(True, index=submission_df.index)
+                )
+                for pf in pred_fields
+            ],
+            axis=1,
+        ).to_numpy()
+        # row-major order matches the original per-row scan
+        for row, col in zip(*null_mask.nonzero()):
+            null_entries.append((keys[row], pred_fields[col]))
     return keys, duplicate_keys, null_entries
 
 
@@ -126,10 +218,14 @@ def run_format_check(
     templates: Dict[str, str] = TEMPLATES_DEFAULT,
     required_columns: Dict[str, List[str]] = REQUIRED_COLUMNS_DEFAULT,
     null_values: Set[str] = NULL_VALUES_DEFAULT,
+    submission_df: Optional[pd.DataFrame] = None,
 ) -> int:
     """
     Run the format check and print results.
 
+    A caller that already parsed the submission (e.g. eval_interface) can pass
+    it as submission_df to avoid a second read of the file.
+
     Returns:
         exit_code: 0 if passed (warnings allowed), 2 if failed.
     """
@@ -149,15 +245,14 @@ def run_format_check(
 
     required = required_columns[task]
 
-    # Step 2: Read header of submission and check columns
-    with open(submission_path, newline="", encoding="utf-8") as fh:
-        reader = csv.reader(fh)
+    # Step 2: Parse submission (once) and check columns
+    if submission_df is None:
         try:
-            header = next(reader)
-        except StopIteration:
+            submission_df = read_csv_df(submission_path)
+        except pd.errors.EmptyDataError:
             print("ERROR: empty submission file", file=sys.stderr)
             return 2
-    header = [h.strip() for h in header]
+    header = [str(h).strip() for h in submission_df.columns]
 
     # Ensure key columns required for grouping are present regardless of REQUIRED_COLUMNS_DEFAULT
     key_cols = KEY_COLUMNS_DEFAULT.get(task, [])
@@ -185,7 +280,7 @@ def run_format_check(
     # Step 3: Load keys from template and submission, check null prediction cells
     template_keys = load_template_keys(template_path, task)
     sub_keys, duplicates, null_entries = load_submission_keys_and_nulls(
-        submission_path, task, required, null_values
+        submission_df, task, required, null_values
     )
 
     # Only treat null prediction cells as failures when they occur for rows
@@ -196,21 +291,23 @@ def run_format_check(
         print(f"WARN: {ignored_nulls} null prediction cells found in rows not in template; these are ignored.")
         warnings_emitted = True
 
-    missing_rows = template_keys - sub_keys
-    extra_rows = sub_keys - template_keys
+    # C-level hashed set ops on the key indexes
+    missing_rows = template_keys.difference(sub_keys)
+    extra_rows = sub_keys.difference(template_keys)
 
     failure = False
 
     # Step 4: Report issues
-    if missing_rows:
+    if len(missing_rows):
         print(f"FAIL: submission is missing {len(missing_rows)} rows present in template. Example(s):")
-        for k in sorted(missing_rows)[:5]:
+        # nsmallest avoids sorting the whole set just to show 5 examples
+        for k in heapq.nsmallest(5, missing_rows):
             print("  -", ",".join(k))
         failure = True
 
-    if extra_rows:
+    if len(extra_rows):
         print(f"WARN: submission contains {len(extra_rows)} rows not in template (extra). Example(s):")
-        for k in sorted(extra_rows)[:5]:
+        for k in heapq.nsmallest(5, extra_rows):
             print("  -", ",".join(k))
         warnings_emitted = True
 